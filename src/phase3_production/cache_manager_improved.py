@@ -3,28 +3,129 @@ IMPROVED Cache Manager with Source Code Storage
 
 Now stores source code alongside documentation for complete context.
 """
+import gzip
 import hashlib
 import time
 import boto3
 import os
-from typing import Dict, Optional
-from datetime import datetime
-from decimal import Decimal
+from botocore.config import Config as BotoConfig
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from ddb_codec import (
+    float_to_decimal, encode_source, decode_source, decompress_source, SOURCE_ENCODING
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Prefix on every cache key; bumping it retires old entries via their TTL
+# (v1 was plain SHA256, v2 is BLAKE3).
+CACHE_KEY_VERSION = 'v2'
 
-def float_to_decimal(obj):
-    """Convert floats to Decimal for DynamoDB."""
-    if isinstance(obj, float):
-        return Decimal(str(obj))
-    elif isinstance(obj, dict):
-        return {k: float_to_decimal(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [float_to_decimal(v) for v in obj]
-    return obj
+try:
+    from blake3 import blake3
+except ImportError:  # blake3 wheel not installed (e.g. local runs)
+    blake3 = None
+    # BLAKE2b digests differ from BLAKE3, so they must not share the v2 keyspace
+    CACHE_KEY_VERSION = 'v2b2'
+    logger.warning(
+        "blake3 is not installed; falling back to BLAKE2b cache keys (%s:). "
+        "Entries written by deployments with blake3 will not be found.",
+        CACHE_KEY_VERSION
+    )
+
+# DynamoDB BatchGetItem accepts at most 100 keys, BatchWriteItem 25 items
+BATCH_GET_LIMIT = 100
+BATCH_WRITE_LIMIT = 25
+BATCH_MAX_RETRIES = 5
+
+# Attributes the readers use; names are aliased because TTL is reserved
+CACHE_ITEM_PROJECTION = (
+    '#fh, file_path, documentation, metadata, created_at, #ttl, '
+    'source_code, source_encoding, source_code_s3, source_size'
+)
+CACHE_ITEM_ATTRIBUTE_NAMES = {'#fh': 'file_hash', '#ttl': 'ttl'}
+
+# In-memory tier in front of DynamoDB (survives across warm invocations)
+MEMORY_CACHE_MAX = 1024
+NEGATIVE_TTL_SECONDS = 30
+
+# Compressed sources larger than this go to S3 and DynamoDB keeps only a
+# pointer; leaves headroom under the 400 KB item limit for the documentation
+SOURCE_S3_THRESHOLD = 300 * 1024
+SOURCE_S3_PREFIX = 'source-code/'
+
+# Shared client config: keep sockets alive between warm invocations and size
+# the pool above ChunkProcessor's max_workers so parallel chunks never queue.
+AWS_CLIENT_CONFIG = BotoConfig(
+    tcp_keepalive=True,
+    max_pool_connections=16,
+    retries={'max_attempts': 5, 'mode': 'adaptive'}
+)
+
+
+def create_dynamodb_resource(region: str = None):
+    """Create a DynamoDB resource using the shared keep-alive config."""
+    return boto3.resource(
+        'dynamodb',
+        region_name=region or os.environ.get('AWS_REGION', 'us-east-1'),
+        config=AWS_CLIENT_CONFIG
+    )
+
+
+def create_dax_resource(endpoint_url: str, region: str = None):
+    """
+    Create a DAX resource for cache reads.
+    
+    amazon-dax-client is not part of the default package; install it (and put
+    the function in the cluster's VPC) when enabling DAX. Returns None when
+    the amazondax package is not installed, in which case reads go straight
+    to DynamoDB.
+    """
+    try:
+        from amazondax import AmazonDaxClient
+    except ImportError:
+        logger.warning("DAX_ENDPOINT set but amazondax is not installed; reading from DynamoDB")
+        return None
+    
+    return AmazonDaxClient.resource(
+        endpoint_url=endpoint_url,
+        region_name=region or os.environ.get('AWS_REGION', 'us-east-1')
+    )
+
+
+def create_s3_client(region: str = None):
+    """Create an S3 client using the shared keep-alive config."""
+    return boto3.client(
+        's3',
+        region_name=region or os.environ.get('AWS_REGION', 'us-east-1'),
+        config=AWS_CLIENT_CONFIG
+    )
+
+
+def new_content_hasher():
+    """Return an incremental BLAKE3 hasher (BLAKE2b, keyed as v2b2, if blake3 is unavailable)."""
+    if blake3 is not None:
+        return blake3()
+    return hashlib.blake2b(digest_size=32)
+
+
+def content_hash(*parts: bytes) -> str:
+    """
+    Fingerprint one or more byte strings for use as a cache key.
+    
+    Parts are fed to the hasher one at a time, so callers never need to
+    concatenate large buffers first. No cryptographic guarantee is needed
+    here, only a stable, collision-resistant content key.
+    """
+    hasher = new_content_hasher()
+    for part in parts:
+        hasher.update(part)
+    return f"{CACHE_KEY_VERSION}:{hasher.hexdigest()}"
 
 
 class CacheManager:
@@ -32,36 +133,129 @@ class CacheManager:
     IMPROVED: Manages documentation cache with source code storage.
     
     Features:
-    - SHA256 hash-based keys
+    - BLAKE3 hash-based keys (versioned)
     - 24-hour TTL auto-expiration
     - Cost tracking
-    - Source code storage (NEW!)
+    - Source code storage, zlib-compressed or offloaded to S3 (NEW!)
     - Decimal conversion for DynamoDB
+    - In-memory LRU tier shared by the warm container
+    - Optional DAX read path (DAX_ENDPOINT)
     """
     
-    def __init__(self, table_name: str = None, region: str = None):
-        """Initialize cache manager."""
+    # Class-level so entries outlive a single handler invocation.
+    # Values are (expires_at, item); item is None for a negative (MISS) entry.
+    _mem: "OrderedDict[Tuple[str, str], Tuple[float, Optional[Dict]]]" = OrderedDict()
+    _mem_lock = threading.Lock()
+    
+    def __init__(
+        self,
+        table_name: str = None,
+        region: str = None,
+        dynamodb_resource=None,
+        source_bucket: str = None,
+        s3_client=None,
+        dax_endpoint: str = None
+    ):
+        """
+        Initialize cache manager.
+        
+        Args:
+            table_name: DynamoDB table name
+            region: AWS region
+            dynamodb_resource: Existing DynamoDB resource to share its connection pool
+            source_bucket: S3 bucket for large source code (inline storage if unset)
+            s3_client: Existing S3 client to share its connection pool
+            dax_endpoint: DAX cluster endpoint for reads (DynamoDB if unset)
+        """
         self.table_name = table_name or os.environ.get('CACHE_TABLE_NAME', 'doc-cache-dev')
         self.region = region or os.environ.get('AWS_REGION', 'us-east-1')
+        self.source_bucket = source_bucket or os.environ.get('SOURCE_BUCKET_NAME')
         
-        # Initialize DynamoDB
-        self.dynamodb = boto3.resource('dynamodb', region_name=self.region)
+        # Initialize DynamoDB (reuse the injected resource when given)
+        self.dynamodb = dynamodb_resource or create_dynamodb_resource(self.region)
         self.table = self.dynamodb.Table(self.table_name)
         
-        logger.info(f"CacheManager initialized with table: {self.table_name}")
+        # Reads go through DAX when configured; writes stay on DynamoDB
+        # (DAX is write-through, so cached reads see them anyway)
+        self.dax_endpoint = dax_endpoint or os.environ.get('DAX_ENDPOINT')
+        self.read_dynamodb = self.dynamodb
+        self.read_table = self.table
+        if self.dax_endpoint:
+            try:
+                dax = create_dax_resource(self.dax_endpoint, self.region)
+                if dax is not None:
+                    read_table = dax.Table(self.table_name)
+                    self.read_dynamodb = dax
+                    self.read_table = read_table
+            except Exception as e:
+                # Runs at import in the Lambda; never fail the cold start over DAX
+                logger.error(f"Error connecting to DAX, reading from DynamoDB: {str(e)}")
+        
+        # S3 is only needed when source offloading is configured
+        self.s3 = None
+        if self.source_bucket:
+            self.s3 = s3_client or create_s3_client(self.region)
+        
+        logger.info(
+            f"CacheManager initialized with table: {self.table_name} "
+            f"(reads via {'DAX' if self.read_dynamodb is not self.dynamodb else 'DynamoDB'})"
+        )
     
     def calculate_hash(self, content: str) -> str:
-        """Calculate SHA256 hash of file content."""
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+        """Calculate BLAKE3 hash of file content."""
+        return content_hash(content.encode('utf-8'))
+    
+    def _mem_get(self, file_hash: str) -> Tuple[bool, Optional[Dict]]:
+        """Look up the in-memory tier. Returns (found, item)."""
+        key = (self.table_name, file_hash)
+        
+        with self._mem_lock:
+            entry = self._mem.get(key)
+            if entry is None:
+                return False, None
+            
+            expires_at, item = entry
+            if expires_at <= time.time():
+                del self._mem[key]
+                return False, None
+            
+            self._mem.move_to_end(key)
+            return True, item
+    
+    def _mem_put(self, file_hash: str, item: Optional[Dict]) -> None:
+        """Store an item (or a negative MISS entry) in the in-memory tier."""
+        if item is None:
+            expires_at = time.time() + NEGATIVE_TTL_SECONDS
+        else:
+            expires_at = float(item.get('ttl', time.time() + NEGATIVE_TTL_SECONDS))
+        
+        key = (self.table_name, file_hash)
+        with self._mem_lock:
+            self._mem[key] = (expires_at, item)
+            self._mem.move_to_end(key)
+            while len(self._mem) > MEMORY_CACHE_MAX:
+                self._mem.popitem(last=False)
     
     def get_cached(self, file_hash: str) -> Optional[Dict]:
-        """Retrieve cached documentation from DynamoDB."""
+        """Retrieve cached documentation, checking memory before DynamoDB."""
+        found, item = self._mem_get(file_hash)
+        if found:
+            logger.info(f"Memory cache {'HIT' if item else 'MISS'} for hash: {file_hash[:16]}...")
+            return item
+        
         try:
-            response = self.table.get_item(Key={'file_hash': file_hash})
+            response = self._read_get_item(
+                Key={'file_hash': file_hash},
+                ProjectionExpression=CACHE_ITEM_PROJECTION,
+                ExpressionAttributeNames=CACHE_ITEM_ATTRIBUTE_NAMES,
+                ReturnConsumedCapacity='NONE'
+            )
+            item = response.get('Item')
+            self._mem_put(file_hash, item)
             
-            if 'Item' in response:
+            if item:
                 logger.info(f"Cache HIT for hash: {file_hash[:16]}...")
-                return response['Item']
+                return item
             else:
                 logger.info(f"Cache MISS for hash: {file_hash[:16]}...")
                 return None
@@ -70,6 +264,171 @@ class CacheManager:
             logger.error(f"Error getting from cache: {str(e)}")
             return None
     
+    def _read_get_item(self, **kwargs) -> Dict:
+        """GetItem on the read path, falling back to DynamoDB if DAX fails."""
+        try:
+            return self.read_table.get_item(**kwargs)
+        except Exception as e:
+            if self.read_table is self.table:
+                raise
+            logger.warning(f"DAX GetItem failed, falling back to DynamoDB: {str(e)}")
+            return self.table.get_item(**kwargs)
+    
+    def _read_batch_get_item(self, **kwargs) -> Dict:
+        """BatchGetItem on the read path, falling back to DynamoDB if DAX fails."""
+        try:
+            return self.read_dynamodb.batch_get_item(**kwargs)
+        except Exception as e:
+            if self.read_dynamodb is self.dynamodb:
+                raise
+            logger.warning(f"DAX BatchGetItem failed, falling back to DynamoDB: {str(e)}")
+            return self.dynamodb.batch_get_item(**kwargs)
+    
+    def batch_get_cached(self, hashes: List[str]) -> Dict[str, Dict]:
+        """
+        Retrieve many cached items with BatchGetItem.
+        
+        Hashes already in the in-memory tier are answered locally. The rest
+        are requested in groups of 100; any UnprocessedKeys are retried with
+        exponential backoff. Above 100 keys, two halves are fetched
+        concurrently.
+        
+        Args:
+            hashes: Cache keys to look up (duplicates are ignored)
+            
+        Returns:
+            Dictionary mapping file_hash -> cached item for every HIT
+        """
+        found = {}
+        unique_hashes = list(dict.fromkeys(hashes))
+        
+        remaining = []
+        for file_hash in unique_hashes:
+            in_memory, item = self._mem_get(file_hash)
+            if not in_memory:
+                remaining.append(file_hash)
+            elif item:
+                found[file_hash] = item
+        
+        if len(remaining) > BATCH_GET_LIMIT:
+            # Page through two halves concurrently on separate pooled connections
+            middle = len(remaining) // 2
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                halves = executor.map(
+                    self._batch_get_from_dynamodb,
+                    (remaining[:middle], remaining[middle:])
+                )
+                for half in halves:
+                    found.update(half)
+        elif remaining:
+            found.update(self._batch_get_from_dynamodb(remaining))
+        
+        logger.info(
+            f"Batch cache lookup: {len(found)}/{len(unique_hashes)} hits "
+            f"({len(unique_hashes) - len(remaining)} answered from memory)"
+        )
+        return found
+    
+    def _batch_get_from_dynamodb(self, hashes: List[str]) -> Dict[str, Dict]:
+        """Fetch hashes from DynamoDB, 100 keys per BatchGetItem request."""
+        found = {}
+        
+        try:
+            for start in range(0, len(hashes), BATCH_GET_LIMIT):
+                group = hashes[start:start + BATCH_GET_LIMIT]
+                request = {
+                    self.table_name: {
+                        'Keys': [{'file_hash': h} for h in group],
+                        'ProjectionExpression': CACHE_ITEM_PROJECTION,
+                        'ExpressionAttributeNames': CACHE_ITEM_ATTRIBUTE_NAMES
+                    }
+                }
+                attempt = 0
+                
+                while request:
+                    response = self._read_batch_get_item(
+                        RequestItems=request,
+                        ReturnConsumedCapacity='NONE'
+                    )
+                    
+                    for item in response.get('Responses', {}).get(self.table_name, []):
+                        found[item['file_hash']] = item
+                        self._mem_put(item['file_hash'], item)
+                    
+                    request = response.get('UnprocessedKeys')
+                    if not request:
+                        # Remember confirmed misses for this group
+                        for file_hash in group:
+                            if file_hash not in found:
+                                self._mem_put(file_hash, None)
+                        break
+                    
+                    if attempt >= BATCH_MAX_RETRIES:
+                        logger.warning(
+                            f"Giving up on {len(request[self.table_name]['Keys'])} "
+                            f"unprocessed keys after {attempt} retries"
+                        )
+                        break
+                    
+                    time.sleep(min(0.05 * (2 ** attempt), 2.0))
+                    attempt += 1
+                    
+        except Exception as e:
+            logger.error(f"Error batch getting from cache: {str(e)}")
+        
+        return found
+    
+    def build_cache_item(
+        self,
+        file_hash: str,
+        file_path: str,
+        documentation: str,
+        metadata: Dict,
+        ttl_hours: int = 24,
+        source_code: str = None,
+        store_source: bool = False,
+        now: float = None
+    ) -> Dict:
+        """
+        Build a DynamoDB cache item (uploads large source to S3 if configured).
+        
+        Args:
+            file_hash: Content hash of the code
+            file_path: Path to the file
+            documentation: Generated documentation
+            metadata: Cost and token metrics
+            ttl_hours: Time to live in hours
+            source_code: Original source code
+            store_source: Whether to store source code
+            now: Unix timestamp to stamp the item with (shared across a batch)
+            
+        Returns:
+            Item ready for put_item / batch_save
+        """
+        # One clock read drives both created_at and the TTL (Unix timestamp)
+        if now is None:
+            now = time.time()
+        ttl = int(now) + (ttl_hours * 3600)
+        
+        # Convert all floats to Decimal for DynamoDB
+        metadata_decimal = float_to_decimal(metadata)
+        
+        # Create item with IMPROVED structure
+        item = {
+            'file_hash': file_hash,
+            'file_path': file_path,
+            'documentation': documentation,
+            'metadata': metadata_decimal,
+            'created_at': datetime.fromtimestamp(now, timezone.utc).isoformat(timespec='seconds'),
+            'ttl': ttl
+        }
+        
+        # ← NEW: Optionally store source code
+        if store_source and source_code:
+            self._attach_source(item, file_hash, source_code)
+        
+        return item
+    
     def save_to_cache(
         self, 
         file_hash: str, 
@@ -84,7 +443,7 @@ class CacheManager:
         Save documentation to DynamoDB cache.
         
         Args:
-            file_hash: SHA256 hash of the code
+            file_hash: Content hash of the code
             file_path: Path to the file
             documentation: Generated documentation
             metadata: Cost and token metrics
@@ -93,29 +452,23 @@ class CacheManager:
             store_source: Whether to store source code (NEW!)
         """
         try:
-            # Calculate TTL (Unix timestamp)
-            ttl = int(time.time()) + (ttl_hours * 3600)
-            
-            # Convert all floats to Decimal for DynamoDB
-            metadata_decimal = float_to_decimal(metadata)
-            
-            # Create item with IMPROVED structure
-            item = {
-                'file_hash': file_hash,
-                'file_path': file_path,
-                'documentation': documentation,
-                'metadata': metadata_decimal,
-                'created_at': datetime.utcnow().isoformat(),
-                'ttl': ttl
-            }
-            
-            # ← NEW: Optionally store source code
-            if store_source and source_code:
-                item['source_code'] = source_code
-                logger.info(f"Storing source code ({len(source_code)} chars)")
+            item = self.build_cache_item(
+                file_hash=file_hash,
+                file_path=file_path,
+                documentation=documentation,
+                metadata=metadata,
+                ttl_hours=ttl_hours,
+                source_code=source_code,
+                store_source=store_source
+            )
             
             # Save to DynamoDB
-            self.table.put_item(Item=item)
+            self.table.put_item(
+                Item=item,
+                ReturnValues='NONE',
+                ReturnConsumedCapacity='NONE'
+            )
+            self._mem_put(file_hash, item)
             
             logger.info(
                 f"Saved to cache: {file_hash[:16]}... "
@@ -127,14 +480,161 @@ class CacheManager:
             logger.error(f"Error saving to cache: {str(e)}")
             return False
     
+    def batch_save(self, items: List[Dict]) -> bool:
+        """
+        Save many cache items with BatchWriteItem.
+        
+        Items are written in groups of 25; any UnprocessedItems are retried
+        with exponential backoff.
+        
+        Args:
+            items: Items from build_cache_item
+            
+        Returns:
+            True if every item was written
+        """
+        # A single BatchWriteItem request may not contain duplicate keys
+        unique_items = list({item['file_hash']: item for item in items}.values())
+        saved = 0
+        
+        try:
+            for start in range(0, len(unique_items), BATCH_WRITE_LIMIT):
+                group = unique_items[start:start + BATCH_WRITE_LIMIT]
+                request = {self.table_name: [{'PutRequest': {'Item': item}} for item in group]}
+                attempt = 0
+                
+                while request:
+                    response = self.dynamodb.batch_write_item(
+                        RequestItems=request,
+                        ReturnConsumedCapacity='NONE',
+                        ReturnItemCollectionMetrics='NONE'
+                    )
+                    
+                    request = response.get('UnprocessedItems')
+                    if not request:
+                        break
+                    
+                    if attempt >= BATCH_MAX_RETRIES:
+                        logger.warning(
+                            f"Giving up on {len(request[self.table_name])} "
+                            f"unprocessed items after {attempt} retries"
+                        )
+                        break
+                    
+                    time.sleep(min(0.05 * (2 ** attempt), 2.0))
+                    attempt += 1
+                
+                unprocessed = {
+                    r['PutRequest']['Item']['file_hash']
+                    for r in (request or {}).get(self.table_name, [])
+                }
+                for item in group:
+                    if item['file_hash'] not in unprocessed:
+                        self._mem_put(item['file_hash'], item)
+                        saved += 1
+                        
+        except Exception as e:
+            logger.error(f"Error batch saving to cache: {str(e)}")
+        
+        logger.info(f"Batch saved {saved}/{len(unique_items)} items to cache")
+        return saved == len(unique_items)
+    
+    def _attach_source(self, item: Dict, file_hash: str, source_code: str) -> None:
+        """Store compressed source inline, or in S3 if it would crowd the item limit."""
+        compressed = encode_source(source_code)
+        item['source_encoding'] = SOURCE_ENCODING
+        
+        if self.s3 and len(compressed) > SOURCE_S3_THRESHOLD:
+            s3_key = f"{SOURCE_S3_PREFIX}{file_hash}"
+            try:
+                self.s3.put_object(
+                    Bucket=self.source_bucket,
+                    Key=s3_key,
+                    Body=compressed,
+                    ContentEncoding='deflate',
+                    ContentType='text/x-python'
+                )
+                item['source_code_s3'] = s3_key
+                item['source_size'] = len(source_code)
+                logger.debug("Stored source code in S3 (%d bytes compressed): %s", len(compressed), s3_key)
+                return
+            except Exception as e:
+                logger.error(f"Error uploading source to S3, storing inline: {str(e)}")
+        
+        item['source_code'] = compressed
+        logger.debug(
+            "Storing source code (%d chars, %d bytes compressed)",
+            len(source_code), len(compressed)
+        )
+    
+    def get_source(self, item: Dict, fetch_remote: bool = True) -> Optional[str]:
+        """
+        Return the source code stored with a cache item.
+        
+        Args:
+            item: Cached item from get_cached / batch_get_cached
+            fetch_remote: Download S3-offloaded source (False skips the request)
+            
+        Returns:
+            Source code, or None if not stored (or not fetched)
+        """
+        s3_key = item.get('source_code_s3')
+        if not s3_key:
+            return decode_source(item)
+        
+        if not fetch_remote or not self.s3:
+            return None
+        
+        try:
+            response = self.s3.get_object(Bucket=self.source_bucket, Key=s3_key)
+            body = response['Body'].read()
+            if item.get('source_encoding') == SOURCE_ENCODING:
+                return decompress_source(body)
+            # Objects uploaded before the inline threshold moved were gzipped
+            return gzip.decompress(body).decode('utf-8')
+        except Exception as e:
+            logger.error(f"Error fetching source from S3: {str(e)}")
+            return None
+    
     def check_exists(self, file_hash: str) -> bool:
-        """Quick check if item exists in cache."""
-        return self.get_cached(file_hash) is not None
+        """Quick check if item exists in cache (fetches only the key)."""
+        found, item = self._mem_get(file_hash)
+        if found:
+            return item is not None
+        
+        try:
+            response = self._read_get_item(
+                Key={'file_hash': file_hash},
+                ProjectionExpression='#fh',
+                ExpressionAttributeNames={'#fh': 'file_hash'},
+                ReturnConsumedCapacity='NONE'
+            )
+            
+            # Key-only item is not cacheable in memory, but a miss is
+            if 'Item' not in response:
+                self._mem_put(file_hash, None)
+                return False
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error checking cache: {str(e)}")
+            return False
     
     def delete_from_cache(self, file_hash: str) -> bool:
         """Delete item from cache."""
         try:
-            self.table.delete_item(Key={'file_hash': file_hash})
+            self.table.delete_item(
+                Key={'file_hash': file_hash},
+                ReturnValues='NONE',
+                ReturnConsumedCapacity='NONE'
+            )
+            with self._mem_lock:
+                self._mem.pop((self.table_name, file_hash), None)
+            if self.s3:
+                self.s3.delete_object(
+                    Bucket=self.source_bucket,
+                    Key=f"{SOURCE_S3_PREFIX}{file_hash}"
+                )
             logger.info(f"Deleted from cache: {file_hash[:16]}...")
             return True
         except Exception as e:
@@ -2,28 +2,35 @@
 IMPROVED Chunk Processor - Now Stores Source Code with Each Chunk
 
 Processes multiple code chunks in parallel with source code storage for complete context.
+Claude calls for cache misses run concurrently on one asyncio event loop.
 """
+import asyncio
+import io
 import logging
-import hashlib
+import time
 from typing import List, Dict, Any, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 from chunking import CodeChunk
+from ddb_codec import decimal_to_float
 from claude_client import ClaudeClient
-from cache_manager import CacheManager
+from cache_manager import CacheManager, content_hash, BATCH_WRITE_LIMIT
 
 logger = logging.getLogger(__name__)
 
+# Emit one aggregated progress line per this many generated chunks
+PROGRESS_LOG_INTERVAL = 25
 
-def decimal_to_float(obj):
-    """Convert Decimal to float for JSON serialization."""
-    if isinstance(obj, Decimal):
-        return float(obj)
-    elif isinstance(obj, dict):
-        return {k: decimal_to_float(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [decimal_to_float(v) for v in obj]
-    return obj
+# Prompt context for each chunk; bound once so only the variable parts are formatted
+_CHUNK_CONTEXT_TEMPLATE = """This is part of a larger file ({file_path}).
+
+**Chunk Information:**
+- Chunk {chunk_number}
+- Lines: {start_line}-{end_line}
+- Type: {chunk_type}
+- Contains: {contains}
+
+Generate documentation for this specific chunk. Focus on the functions/classes present.
+""".format
 
 
 class ChunkProcessor:
@@ -31,7 +38,7 @@ class ChunkProcessor:
     IMPROVED: Processes code chunks with source code storage.
     
     Features:
-    - Parallel API calls for chunks
+    - Concurrent API calls for chunks (asyncio, bounded by max_workers)
     - Individual chunk caching with source code (NEW!)
     - Intelligent documentation merging
     - Progress tracking
@@ -50,7 +57,7 @@ class ChunkProcessor:
         Args:
             claude_client: Claude API client
             cache_manager: Cache manager for chunk caching
-            max_workers: Maximum parallel workers (default: 5)
+            max_workers: Maximum concurrent Claude calls (default: 5)
             store_source_code: Store source code with docs (NEW!)
         """
         self.claude_client = claude_client
@@ -63,7 +70,15 @@ class ChunkProcessor:
         file_path: str,
         chunks: List[CodeChunk]
     ) -> Tuple[str, Dict[str, Any]]:
-        """Process all chunks in parallel and merge results."""
+        """Process all chunks concurrently and merge results."""
+        return asyncio.run(self.process_chunks_async(file_path, chunks))
+    
+    async def process_chunks_async(
+        self,
+        file_path: str,
+        chunks: List[CodeChunk]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Async version of process_chunks."""
         logger.info(
             f"Processing {len(chunks)} chunks with {self.max_workers} workers "
             f"(storing source code: {self.store_source_code})"  # ← NEW
@@ -75,47 +90,83 @@ class ChunkProcessor:
         cache_hits = 0
         cache_misses = 0
         
-        # Process chunks in parallel
+        # Hash all chunks in parallel (the hashers release the GIL on large
+        # inputs), then look them up in a single BatchGetItem pass
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_chunk = {
-                executor.submit(
-                    self._process_single_chunk,
-                    file_path,
-                    chunk
-                ): chunk
-                for chunk in chunks
-            }
+            chunk_hashes = list(executor.map(
+                lambda chunk: self._calculate_chunk_hash(file_path, chunk),
+                chunks
+            ))
+        cached_map = self.cache_manager.batch_get_cached(chunk_hashes)
+        
+        misses = []
+        for chunk, chunk_hash in zip(chunks, chunk_hashes):
+            cached = cached_map.get(chunk_hash)
             
-            for future in as_completed(future_to_chunk):
-                chunk = future_to_chunk[future]
+            if cached:
+                result = self._build_cached_result(chunk, cached)
+                chunk_results.append(result)
+                total_tokens += result['tokens']
+                cache_hits += 1
+            else:
+                misses.append((chunk, chunk_hash))
+        
+        logger.info("Chunk cache lookup: %d hits, %d misses", cache_hits, len(misses))
+        
+        # Only cache misses call Claude; their cache items are flushed with
+        # BatchWriteItem every 25 results, so a timeout keeps finished work
+        pending_items = []
+        semaphore = asyncio.Semaphore(self.max_workers)
+        completed = 0
+        batch_time = time.time()  # created_at / TTL shared by the whole batch
+        
+        async with self.claude_client.create_async_http_client() as http_client:
+            async def bounded(chunk: CodeChunk, chunk_hash: str):
+                nonlocal completed
+                async with semaphore:
+                    try:
+                        result, cache_item = await self._process_single_chunk_async(
+                            file_path, chunk, chunk_hash, http_client, batch_time
+                        )
+                    finally:
+                        completed += 1
+                        if completed % PROGRESS_LOG_INTERVAL == 0:
+                            logger.info("Chunks %d/%d generated", completed, len(misses))
                 
-                try:
-                    result = future.result()
-                    chunk_results.append(result)
-                    
-                    total_cost += result['cost']
-                    total_tokens += result['tokens']
-                    
-                    if result['cached']:
-                        cache_hits += 1
-                    else:
-                        cache_misses += 1
-                    
-                    logger.info(
-                        f"Chunk {chunk.chunk_id + 1}/{len(chunks)} complete "
-                        f"(cached: {result['cached']}, cost: ${result['cost']:.6f})"
-                    )
-                    
-                except Exception as e:
-                    logger.error(f"Error processing chunk {chunk.chunk_id}: {e}")
-                    chunk_results.append({
-                        'chunk_id': chunk.chunk_id,
-                        'documentation': f"<!-- Error processing chunk {chunk.chunk_id}: {str(e)} -->",
-                        'cost': 0.0,
-                        'tokens': 0,
-                        'cached': False,
-                        'error': str(e)
-                    })
+                # Flush outside the semaphore so writes never hold a Claude slot
+                pending_items.append(cache_item)
+                if len(pending_items) >= BATCH_WRITE_LIMIT:
+                    group = pending_items[:]
+                    pending_items.clear()
+                    await asyncio.to_thread(self.cache_manager.batch_save, group)
+                return result
+            
+            outcomes = await asyncio.gather(
+                *(bounded(chunk, chunk_hash) for chunk, chunk_hash in misses),
+                return_exceptions=True
+            )
+        
+        if pending_items:
+            await asyncio.to_thread(self.cache_manager.batch_save, pending_items)
+        
+        for (chunk, _), outcome in zip(misses, outcomes):
+            # gather can also hand back BaseExceptions such as CancelledError
+            if isinstance(outcome, BaseException):
+                logger.error(f"Error processing chunk {chunk.chunk_id}: {outcome}")
+                chunk_results.append({
+                    'chunk_id': chunk.chunk_id,
+                    'documentation': f"<!-- Error processing chunk {chunk.chunk_id}: {str(outcome)} -->",
+                    'cost': 0.0,
+                    'tokens': 0,
+                    'cached': False,
+                    'error': str(outcome)
+                })
+                continue
+            
+            chunk_results.append(outcome)
+            total_cost += outcome['cost']
+            total_tokens += outcome['tokens']
+            cache_misses += 1
         
         # Sort results by chunk_id
         chunk_results.sort(key=lambda x: x['chunk_id'])
@@ -141,99 +192,108 @@ class ChunkProcessor:
         
         return merged_doc, metrics
     
-    def _process_single_chunk(
+    def _build_cached_result(self, chunk: CodeChunk, cached: Dict) -> Dict[str, Any]:
+        """Build a chunk result from a cache HIT."""
+        # Only metadata holds Decimals; skip copying the documentation
+        metadata = decimal_to_float(cached.get('metadata', {}))
+        
+        return {
+            'chunk_id': chunk.chunk_id,
+            'documentation': cached['documentation'],
+            'cost': 0.0,
+            'tokens': metadata.get('tokens', 0),
+            'cached': True,
+            # Merged docs never use per-chunk source, so skip S3 downloads
+            'source_code': self.cache_manager.get_source(cached, fetch_remote=False)  # ← NEW
+        }
+    
+    async def _process_single_chunk_async(
         self,
         file_path: str,
-        chunk: CodeChunk
-    ) -> Dict[str, Any]:
+        chunk: CodeChunk,
+        chunk_hash: str,
+        http_client=None,
+        now: float = None
+    ) -> Tuple[Dict[str, Any], Dict]:
         """
-        Process a single chunk with source code storage.
+        Generate documentation for a cache-miss chunk.
+        
+        Nothing is written to the cache here; the returned item is saved by
+        process_chunks_async in BatchWriteItem groups.
         
         Args:
             file_path: Original file path
             chunk: Code chunk to process
+            chunk_hash: Precomputed cache key for the chunk
+            http_client: Shared async HTTP client for Claude calls
+            now: Timestamp for the cache item (shared across the batch)
             
         Returns:
-            Dictionary with documentation and metrics
+            Tuple of (result with documentation and metrics, cache item to save)
         """
-        # Calculate chunk hash for caching
-        chunk_hash = self._calculate_chunk_hash(file_path, chunk)
+        context = self._build_chunk_context(file_path, chunk)
         
-        # Check cache
-        cached = self.cache_manager.get_cached(chunk_hash)
+        # Generate documentation
+        documentation, cost_metrics = await self.claude_client.agenerate_documentation(
+            code=chunk.content,
+            file_path=f"{file_path} (Chunk {chunk.chunk_id + 1})",
+            analysis=None,
+            context=context,
+            http_client=http_client
+        )
         
-        if cached:
-            # Cache HIT
-            logger.info(f"Cache HIT for chunk {chunk.chunk_id}")
-            cached_clean = decimal_to_float(cached)
-            
-            return {
-                'chunk_id': chunk.chunk_id,
-                'documentation': cached_clean['documentation'],
-                'cost': 0.0,
-                'tokens': cached_clean['metadata'].get('tokens', 0),
-                'cached': True,
-                'source_code': cached_clean.get('source_code')  # ← NEW
-            }
-        else:
-            # Cache MISS - generate documentation
-            logger.info(f"Cache MISS for chunk {chunk.chunk_id}, generating docs")
-            
-            context = self._build_chunk_context(file_path, chunk)
-            
-            # Generate documentation
-            documentation, cost_metrics = self.claude_client.generate_documentation(
-                code=chunk.content,
-                file_path=f"{file_path} (Chunk {chunk.chunk_id + 1})",
-                analysis=None,
-                context=context
-            )
-            
-            # Save to cache WITH source code
-            cache_metadata = {
-                'cost': cost_metrics['total_cost'],
-                'tokens': cost_metrics['total_tokens'],
-                'chunk_id': chunk.chunk_id,
-                'chunk_lines': f"{chunk.start_line}-{chunk.end_line}"
-            }
-            
-            self.cache_manager.save_to_cache(
-                file_hash=chunk_hash,
-                file_path=f"{file_path}#chunk{chunk.chunk_id}",
-                documentation=documentation,
-                metadata=cache_metadata,
-                source_code=chunk.content,           # ← NEW: Store chunk source
-                store_source=self.store_source_code, # ← NEW: Use flag
-                ttl_hours=24
-            )
-            
-            return {
-                'chunk_id': chunk.chunk_id,
-                'documentation': documentation,
-                'cost': cost_metrics['total_cost'],
-                'tokens': cost_metrics['total_tokens'],
-                'cached': False,
-                'source_code': chunk.content  # ← NEW
-            }
+        # Build cache item WITH source code (flushed in batches by process_chunks)
+        cache_metadata = {
+            'cost': cost_metrics['total_cost'],
+            'tokens': cost_metrics['total_tokens'],
+            'chunk_id': chunk.chunk_id,
+            'chunk_lines': f"{chunk.start_line}-{chunk.end_line}"
+        }
+        
+        # May upload large source to S3, so keep it off the event loop
+        cache_item = await asyncio.to_thread(
+            self.cache_manager.build_cache_item,
+            file_hash=chunk_hash,
+            file_path=f"{file_path}#chunk{chunk.chunk_id}",
+            documentation=documentation,
+            metadata=cache_metadata,
+            source_code=chunk.content,           # ← NEW: Store chunk source
+            store_source=self.store_source_code, # ← NEW: Use flag
+            ttl_hours=24,
+            now=now
+        )
+        
+        result = {
+            'chunk_id': chunk.chunk_id,
+            'documentation': documentation,
+            'cost': cost_metrics['total_cost'],
+            'tokens': cost_metrics['total_tokens'],
+            'cached': False,
+            'source_code': chunk.content  # ← NEW
+        }
+        return result, cache_item
     
     def _calculate_chunk_hash(self, file_path: str, chunk: CodeChunk) -> str:
         """Calculate unique hash for a chunk (for caching)."""
-        hash_input = f"{file_path}::{chunk.chunk_id}::{chunk.content}"
-        return hashlib.sha256(hash_input.encode('utf-8')).hexdigest()
+        # Stream each part into the hasher instead of building one big string
+        return content_hash(
+            file_path.encode('utf-8'),
+            b'::',
+            str(chunk.chunk_id).encode('utf-8'),
+            b'::',
+            chunk.content.encode('utf-8')
+        )
     
     def _build_chunk_context(self, file_path: str, chunk: CodeChunk) -> str:
         """Build context string for chunk documentation."""
-        context = f"""This is part of a larger file ({file_path}).
-
-**Chunk Information:**
-- Chunk {chunk.chunk_id + 1}
-- Lines: {chunk.start_line}-{chunk.end_line}
-- Type: {chunk.type}
-- Contains: {', '.join(chunk.elements) if chunk.elements else 'code'}
-
-Generate documentation for this specific chunk. Focus on the functions/classes present.
-"""
-        return context
+        return _CHUNK_CONTEXT_TEMPLATE(
+            file_path=file_path,
+            chunk_number=chunk.chunk_id + 1,
+            start_line=chunk.start_line,
+            end_line=chunk.end_line,
+            chunk_type=chunk.type,
+            contains=', '.join(chunk.elements) if chunk.elements else 'code'
+        )
     
     def _merge_chunk_documentation(
         self,
@@ -252,37 +312,32 @@ Generate documentation for this specific chunk. Focus on the functions/classes p
         Returns:
             Merged documentation string
         """
-        doc_parts = []
+        buf = io.StringIO()
+        w = buf.write
         
         # Header
-        doc_parts.append(f"# Documentation: {file_path}")
-        doc_parts.append("")
-        doc_parts.append(f"*This file was processed in {len(chunks)} chunks using AST-based intelligent chunking.*")  # ← IMPROVED
-        doc_parts.append("")
+        w(f"# Documentation: {file_path}\n\n")
+        w(f"*This file was processed in {len(chunks)} chunks using AST-based intelligent chunking.*\n")  # ← IMPROVED
         
         # Add each chunk's documentation
         for i, result in enumerate(chunk_results):
             chunk = chunks[i]
             
             # Section header
-            doc_parts.append(f"## Chunk {chunk.chunk_id + 1}: Lines {chunk.start_line}-{chunk.end_line}")
-            doc_parts.append("")
+            w(f"\n## Chunk {chunk.chunk_id + 1}: Lines {chunk.start_line}-{chunk.end_line}\n\n")
             
             if chunk.elements:
-                doc_parts.append(f"*Contains: {', '.join(chunk.elements)}*")
-                doc_parts.append("")
+                w(f"*Contains: {', '.join(chunk.elements)}*\n\n")
             
             # Add documentation
             chunk_doc = result['documentation']
             
-            # Remove redundant headers
-            lines = chunk_doc.split('\n')
-            if lines and lines[0].startswith('# '):
-                lines = lines[1:]
+            # Remove redundant headers (drop the first line in one scan)
+            if chunk_doc.startswith('# '):
+                newline = chunk_doc.find('\n')
+                chunk_doc = chunk_doc[newline + 1:] if newline != -1 else ''
             
-            doc_parts.append('\n'.join(lines).strip())
-            doc_parts.append("")
-            doc_parts.append("---")
-            doc_parts.append("")
+            w(chunk_doc.strip())
+            w("\n\n---\n")
         
-        return '\n'.join(doc_parts)
+        return buf.getvalue()
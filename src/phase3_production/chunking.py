@@ -70,8 +70,9 @@ class IntelligentChunker:
         Returns:
             True if file should be chunked, False otherwise
         """
-        lines = content.split('\n')
-        total_lines = len(lines)
+        # Count newlines instead of splitting: same total as len(split('\n'))
+        # without materializing a list of every line
+        total_lines = content.count('\n') + 1
         
         # Chunk if file is larger than max_chunk_lines
         should_chunk = total_lines > self.max_chunk_lines
@@ -8,7 +8,7 @@ import logging
 from typing import Dict, Any, Tuple
 import httpx
 from models import create_cost_metrics
-from retry_logic import with_retry, RetryConfig
+from retry_logic import with_retry, with_retry_async, RetryConfig
 
 logger = logging.getLogger(__name__)
 
@@ -75,16 +75,104 @@ class ClaudeClient:
             logger.error(f"Failed to generate documentation after retries: {e}")
             raise
     
+    async def agenerate_documentation(
+        self,
+        code: str,
+        file_path: str,
+        analysis: Dict = None,
+        context: str = None,
+        http_client: httpx.AsyncClient = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Async version of generate_documentation.
+        
+        Args:
+            code: Source code to document
+            file_path: Path shown in the prompt
+            analysis: Unused, kept for signature parity
+            context: Extra prompt context
+            http_client: Shared AsyncClient so concurrent calls reuse connections
+        """
+        # Called once per chunk; ChunkProcessor logs aggregated progress at INFO
+        logger.debug("Generating documentation for %s", file_path)
+        
+        @with_retry_async(self.retry_config)
+        async def make_api_call():
+            return await self._acall_claude_api(code, file_path, context, http_client)
+        
+        try:
+            documentation, usage = await make_api_call()
+            
+            cost_metrics = self._calculate_cost(
+                usage['input_tokens'],
+                usage['output_tokens']
+            )
+            
+            logger.debug(
+                "Generated documentation. Tokens: %d, Cost: $%.6f",
+                cost_metrics['total_tokens'],
+                cost_metrics['total_cost']
+            )
+            
+            return documentation, cost_metrics
+            
+        except Exception as e:
+            logger.error(f"Failed to generate documentation after retries: {e}")
+            raise
+    
+    def create_async_http_client(self) -> httpx.AsyncClient:
+        """Create an AsyncClient to share across agenerate_documentation calls."""
+        return httpx.AsyncClient(timeout=60.0)
+    
     def _call_claude_api(self, code: str, file_path: str, context: str = None) -> Tuple[str, Dict]:
         """
         Make the actual API call to Claude.
         
         This method is wrapped by retry logic.
         """
+        headers, payload = self._build_request(code, file_path, context)
+        
+        # Make HTTP request
+        with httpx.Client(timeout=60.0) as client:
+            response = client.post(
+                self.api_url,
+                headers=headers,
+                json=payload
+            )
+            
+            # This will raise an exception for 4xx/5xx status codes
+            # The retry logic will catch retryable ones (429, 503, etc.)
+            response.raise_for_status()
+            
+            data = response.json()
+        
+        return self._parse_response(data)
+    
+    async def _acall_claude_api(
+        self,
+        code: str,
+        file_path: str,
+        context: str = None,
+        http_client: httpx.AsyncClient = None
+    ) -> Tuple[str, Dict]:
+        """Async version of _call_claude_api (wrapped by async retry logic)."""
+        headers, payload = self._build_request(code, file_path, context)
+        
+        if http_client is None:
+            async with self.create_async_http_client() as client:
+                response = await client.post(self.api_url, headers=headers, json=payload)
+        else:
+            response = await http_client.post(self.api_url, headers=headers, json=payload)
+        
+        response.raise_for_status()
+        
+        return self._parse_response(response.json())
+    
+    def _build_request(self, code: str, file_path: str, context: str = None) -> Tuple[Dict, Dict]:
+        """Build request headers and payload."""
         # Build prompt
         prompt = self._build_prompt(code, file_path, context)
         
-        # Build request
         headers = {
             "x-api-key": self.api_key,
             "anthropic-version": "2023-06-01",
@@ -103,21 +191,10 @@ class ClaudeClient:
             ]
         }
         
-        # Make HTTP request
-        with httpx.Client(timeout=60.0) as client:
-            response = client.post(
-                self.api_url,
-                headers=headers,
-                json=payload
-            )
-            
-            # This will raise an exception for 4xx/5xx status codes
-            # The retry logic will catch retryable ones (429, 503, etc.)
-            response.raise_for_status()
-            
-            data = response.json()
-        
-        # Extract documentation and usage
+        return headers, payload
+    
+    def _parse_response(self, data: Dict) -> Tuple[str, Dict]:
+        """Extract documentation and usage from an API response."""
         documentation = data['content'][0]['text']
         usage = {
             'input_tokens': data['usage']['input_tokens'],
@@ -0,0 +1,91 @@
+"""
+DynamoDB value conversion helpers.
+
+DynamoDB rejects Python floats and returns every number as Decimal. Both
+directions are done with a single C-level json round-trip instead of a
+recursive pure-Python walk of the structure.
+
+Stored source code is zlib-compressed into a Binary attribute to keep
+items (and their RCU/WCU cost) small.
+"""
+import json
+import zlib
+from decimal import Decimal
+from typing import Dict, Optional
+
+SOURCE_ENCODING = 'zlib'
+SOURCE_COMPRESSION_LEVEL = 6
+
+
+def _decimal_default(obj):
+    """json.dumps fallback for values DynamoDB hands back."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class _NeedsWalk(Exception):
+    """Raised by _float_default when a value must pass through unchanged."""
+
+
+def _float_default(obj):
+    """json.dumps fallback for values headed to DynamoDB."""
+    if isinstance(obj, (Decimal, set, frozenset)):
+        # Already valid DynamoDB values; json cannot carry them through as-is
+        raise _NeedsWalk
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _walk_float_to_decimal(obj):
+    """Recursive fallback that keeps Decimal and set values as they are."""
+    if isinstance(obj, float):
+        return Decimal(str(obj))
+    if isinstance(obj, dict):
+        return {k: _walk_float_to_decimal(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_walk_float_to_decimal(v) for v in obj]
+    if isinstance(obj, (set, frozenset)):
+        return {_walk_float_to_decimal(v) for v in obj}
+    if obj is None or isinstance(obj, (str, int, Decimal)):
+        return obj
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def float_to_decimal(obj):
+    """Convert floats to Decimal for DynamoDB."""
+    try:
+        return json.loads(json.dumps(obj, default=_float_default), parse_float=Decimal)
+    except _NeedsWalk:
+        # e.g. re-saving a cached item whose metadata already holds Decimals
+        return _walk_float_to_decimal(obj)
+
+
+def decimal_to_float(obj):
+    """Convert Decimal to float for JSON serialization."""
+    return json.loads(json.dumps(obj, default=_decimal_default))
+
+
+def encode_source(source_code: str) -> bytes:
+    """Compress source code for storage as a DynamoDB Binary attribute."""
+    return zlib.compress(source_code.encode('utf-8'), SOURCE_COMPRESSION_LEVEL)
+
+
+def decompress_source(data: bytes) -> str:
+    """Decompress source code produced by encode_source."""
+    # boto3 returns Binary attributes wrapped in boto3.dynamodb.types.Binary
+    return zlib.decompress(bytes(data)).decode('utf-8')
+
+
+def decode_source(item: Dict) -> Optional[str]:
+    """Return the stored source code of a cache item, decompressing if needed."""
+    source_code = item.get('source_code')
+    if source_code is None:
+        return None
+    
+    if item.get('source_encoding') == SOURCE_ENCODING:
+        return decompress_source(source_code)
+    
+    # Items written before compression stored plain strings
+    return source_code
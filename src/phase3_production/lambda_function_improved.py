@@ -8,10 +8,9 @@ import os
 import logging
 from datetime import datetime
 from typing import Dict, Any
-from decimal import Decimal
 
 # Local imports
-from cache_manager import CacheManager
+from cache_manager import CacheManager, create_dynamodb_resource
 from code_analyzer import PythonCodeAnalyzer
 from claude_client import ClaudeClient
 from cost_tracker import CostTracker
@@ -19,6 +18,7 @@ from models import create_documentation_result
 from config import Config
 from chunking import IntelligentChunker
 from chunk_processor import ChunkProcessor
+from ddb_codec import decimal_to_float
 
 # Configure logging
 logger = logging.getLogger()
@@ -26,9 +26,12 @@ logger.setLevel(logging.INFO)
 
 # Initialize components
 config = Config()
+dynamodb = create_dynamodb_resource(os.environ.get('AWS_REGION', 'us-east-1'))  # Shared across warm invocations
 cache_manager = CacheManager(
     table_name=os.environ.get('CACHE_TABLE_NAME'),
-    region=os.environ.get('AWS_REGION', 'us-east-1')
+    region=os.environ.get('AWS_REGION', 'us-east-1'),
+    dynamodb_resource=dynamodb,
+    source_bucket=os.environ.get('SOURCE_BUCKET_NAME')  # Large sources offloaded to S3
 )
 analyzer = PythonCodeAnalyzer()
 claude_client = ClaudeClient(api_key=os.environ['ANTHROPIC_API_KEY'])
@@ -48,17 +51,6 @@ chunk_processor = ChunkProcessor(
 )
 
 
-def decimal_to_float(obj):
-    """Convert Decimal to float for JSON serialization."""
-    if isinstance(obj, Decimal):
-        return float(obj)
-    elif isinstance(obj, dict):
-        return {k: decimal_to_float(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [decimal_to_float(v) for v in obj]
-    return obj
-
-
 def lambda_handler(event, context):
     """Main Lambda handler with improved chunking and source code storage."""
     logger.info(f"Request received: {context.aws_request_id}")
@@ -99,22 +91,24 @@ def handle_small_file(request_id: str, file_path: str, file_content: str) -> Dic
     if cached:
         # CACHE HIT
         logger.info("Cache HIT - returning cached documentation")
-        cached_clean = decimal_to_float(cached)
+        # Only metadata holds Decimals; skip copying the documentation
+        metadata = decimal_to_float(cached.get('metadata', {}))
         
         result = create_documentation_result(
             request_id=request_id,
             file_path=file_path,
-            documentation=cached_clean['documentation'],
+            documentation=cached['documentation'],
             total_cost=0.0,
-            total_tokens=cached_clean['metadata'].get('tokens', 0),
+            total_tokens=metadata.get('tokens', 0),
             processing_time=0.1,
             cached=True,
             cache_key=file_hash
         )
         
         # Include source code in response if available
-        if 'source_code' in cached_clean:
-            result['source_code'] = cached_clean['source_code']
+        source_code = cache_manager.get_source(cached)
+        if source_code is not None:
+            result['source_code'] = source_code
         
         return success_response(result)
     
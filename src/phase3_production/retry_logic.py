@@ -6,9 +6,10 @@ Handles transient failures gracefully:
 - 503 Service Unavailable  
 - Network timeouts
 """
+import asyncio
 import time
 import logging
-from typing import Callable, Any, TypeVar, Optional
+from typing import Awaitable, Callable, Any, TypeVar, Optional
 from functools import wraps
 
 logger = logging.getLogger(__name__)
@@ -154,3 +155,51 @@ def with_retry(config: Optional[RetryConfig] = None):
             
         return wrapper
     return decorator
+
+
+def with_retry_async(config: Optional[RetryConfig] = None):
+    """Async version of with_retry (backs off with asyncio.sleep)."""
+    if config is None:
+        config = RetryConfig()
+    
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @wraps(func)
+        async def wrapper(*args, **kwargs) -> T:
+            for attempt in range(config.max_attempts):
+                try:
+                    result = await func(*args, **kwargs)
+                    
+                    if attempt > 0:
+                        logger.info(
+                            f"✅ SUCCESS on attempt {attempt + 1}/{config.max_attempts} "
+                            f"for {func.__name__}"
+                        )
+                    
+                    return result
+                    
+                except Exception as e:
+                    logger.warning(f"Caught exception: {type(e).__name__} - {str(e)[:100]}")
+                    
+                    if not should_retry(e, config):
+                        logger.error(f"❌ Non-retryable error in {func.__name__}: {str(e)[:200]}")
+                        raise
+                    
+                    if attempt + 1 >= config.max_attempts:
+                        logger.error(
+                            f"❌ Max retry attempts ({config.max_attempts}) reached "
+                            f"for {func.__name__}"
+                        )
+                        raise
+                    
+                    delay = calculate_backoff_delay(attempt, config)
+                    
+                    logger.warning(
+                        f"🔄 Attempt {attempt + 1}/{config.max_attempts} failed for {func.__name__}. "
+                        f"Retrying in {delay:.1f}s... (Error: {str(e)[:100]})"
+                    )
+                    
+                    # Yield to other in-flight requests while waiting
+                    await asyncio.sleep(delay)
+            
+        return wrapper
+    return decorator
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Local test for cache batching logic (no AWS calls)
+
+Runs CacheManager against an in-memory stub of the DynamoDB resource.
+
+Tests:
+1. BatchGetItem groups of 100 keys
+2. Two concurrent halves above 100 keys
+3. UnprocessedKeys retry and give-up
+4. Memory tier hits, negative entries and LRU eviction
+5. BatchWriteItem groups of 25 (duplicates dropped)
+6. UnprocessedItems retry and give-up
+7. Key-only check_exists
+"""
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cache_manager_improved as cache_module
+from cache_manager_improved import CacheManager, BATCH_GET_LIMIT, BATCH_WRITE_LIMIT
+
+
+failures = 0
+
+
+def check(condition: bool, message: str):
+    """Print a PASS/FAIL line and remember failures."""
+    global failures
+    if condition:
+        print(f"✅ PASS: {message}")
+    else:
+        failures += 1
+        print(f"❌ FAIL: {message}")
+
+
+class StubDynamoDB:
+    """
+    Minimal stand-in for boto3.resource('dynamodb').
+
+    unprocessed_rounds: how many calls return their last key/item as
+    unprocessed before the stub starts answering everything.
+    barrier: if set, each thread's first BatchGetItem waits on it, so a
+    lookup only completes when that many threads are in flight together.
+    """
+
+    def __init__(self, unprocessed_rounds: int = 0):
+        self.store = {}
+        self.unprocessed_rounds = unprocessed_rounds
+        self.get_requests = []     # (thread name, keys) per BatchGetItem call
+        self.write_requests = []   # items per BatchWriteItem call
+        self.get_item_calls = []   # kwargs per GetItem call
+        self.barrier = None
+        self.lock = threading.Lock()
+
+    def Table(self, name):
+        return StubTable(self)
+
+    def _take_unprocessed_round(self) -> bool:
+        with self.lock:
+            if self.unprocessed_rounds > 0:
+                self.unprocessed_rounds -= 1
+                return True
+            return False
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        (table_name, spec), = RequestItems.items()
+        keys = spec['Keys']
+        thread = threading.current_thread().name
+        with self.lock:
+            first_call = all(name != thread for name, _ in self.get_requests)
+            self.get_requests.append((thread, [k['file_hash'] for k in keys]))
+
+        if self.barrier is not None and first_call:
+            self.barrier.wait()
+
+        unprocessed = {}
+        if self._take_unprocessed_round():
+            unprocessed = {table_name: dict(spec, Keys=keys[-1:])}
+            keys = keys[:-1]
+
+        items = [self.store[k['file_hash']] for k in keys if k['file_hash'] in self.store]
+        return {'Responses': {table_name: items}, 'UnprocessedKeys': unprocessed}
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        (table_name, requests), = RequestItems.items()
+        self.write_requests.append([r['PutRequest']['Item']['file_hash'] for r in requests])
+
+        unprocessed = {}
+        if self._take_unprocessed_round():
+            unprocessed = {table_name: requests[-1:]}
+            requests = requests[:-1]
+
+        for request in requests:
+            item = request['PutRequest']['Item']
+            self.store[item['file_hash']] = item
+        return {'UnprocessedItems': unprocessed}
+
+
+class StubTable:
+    """Minimal stand-in for a boto3 DynamoDB Table."""
+
+    def __init__(self, dynamodb: StubDynamoDB):
+        self.dynamodb = dynamodb
+
+    def get_item(self, Key, **kwargs):
+        self.dynamodb.get_item_calls.append(kwargs)
+        item = self.dynamodb.store.get(Key['file_hash'])
+        if item is None:
+            return {}
+        if kwargs.get('ProjectionExpression') == '#fh':
+            return {'Item': {'file_hash': item['file_hash']}}
+        return {'Item': item}
+
+
+def make_cache(name: str, unprocessed_rounds: int = 0, stored: int = 0):
+    """Build a CacheManager on a fresh stub with `stored` items already present."""
+    CacheManager._mem.clear()
+    dynamodb = StubDynamoDB(unprocessed_rounds)
+    cache = CacheManager(table_name=name, dynamodb_resource=dynamodb)
+
+    for i in range(stored):
+        item = cache.build_cache_item(f"h{i}", f"file_{i}.py", f"docs {i}", {'cost': 0.5})
+        dynamodb.store[item['file_hash']] = item
+    return cache, dynamodb
+
+
+def test_batch_get_groups():
+    """Test that lookups are split into BatchGetItem groups of 100."""
+    print("TEST 1: BatchGetItem Groups of 100")
+    print("-" * 80)
+
+    cache, dynamodb = make_cache('batch-get', stored=BATCH_GET_LIMIT)
+    found = cache.batch_get_cached([f"h{i}" for i in range(BATCH_GET_LIMIT)])
+
+    check(len(dynamodb.get_requests) == 1, "100 keys sent in one request")
+    check(len(found) == BATCH_GET_LIMIT, "All 100 items found")
+
+    # Duplicates are ignored
+    cache, dynamodb = make_cache('batch-get-dupes', stored=3)
+    found = cache.batch_get_cached(['h0', 'h1', 'h0', 'h2', 'h1'])
+    check(dynamodb.get_requests[0][1] == ['h0', 'h1', 'h2'], "Duplicate keys requested once")
+    check(len(found) == 3, "Duplicate keys still answered")
+    print()
+
+
+def test_batch_get_split():
+    """Test that more than 100 keys are fetched as two concurrent halves."""
+    print("TEST 2: Two Concurrent Halves Above 100 Keys")
+    print("-" * 80)
+
+    cache, dynamodb = make_cache('batch-split', stored=250)
+    dynamodb.barrier = threading.Barrier(2, timeout=5)
+    found = cache.batch_get_cached([f"h{i}" for i in range(250)])
+
+    sizes = sorted(len(keys) for _, keys in dynamodb.get_requests)
+    threads = {thread for thread, _ in dynamodb.get_requests}
+
+    check(len(found) == 250, "All 250 items found")
+    check(all(size <= BATCH_GET_LIMIT for size in sizes), f"Every request <= 100 keys {sizes}")
+    check(sizes == [25, 25, 100, 100], "Each 125-key half paged as 100 + 25")
+    check(len(threads) == 2, "Halves fetched concurrently on two threads")
+    print()
+
+
+def test_unprocessed_keys():
+    """Test UnprocessedKeys retry and give-up after BATCH_MAX_RETRIES."""
+    print("TEST 3: UnprocessedKeys Retry")
+    print("-" * 80)
+
+    cache, dynamodb = make_cache('unprocessed-keys', unprocessed_rounds=2, stored=10)
+    found = cache.batch_get_cached([f"h{i}" for i in range(10)])
+
+    check(len(found) == 10, "All items found after retries")
+    check(len(dynamodb.get_requests) == 3, "Unprocessed keys retried twice")
+    check(dynamodb.get_requests[1][1] == ['h9'], "Only the unprocessed key was re-requested")
+
+    # Stub never finishes: give up, and don't remember the key as a miss
+    cache, dynamodb = make_cache('unprocessed-give-up', unprocessed_rounds=100, stored=3)
+    found = cache.batch_get_cached(['h0', 'h1', 'h2'])
+    in_memory, _ = cache._mem_get('h2')
+
+    check(len(dynamodb.get_requests) == cache_module.BATCH_MAX_RETRIES + 1, "Gave up after max retries")
+    check(sorted(found) == ['h0', 'h1'], "Processed keys still returned")
+    check(not in_memory, "Unanswered key not cached as a miss")
+    print()
+
+
+def test_memory_tier():
+    """Test memory hits, negative entries and LRU eviction."""
+    print("TEST 4: Memory Tier")
+    print("-" * 80)
+
+    cache, dynamodb = make_cache('memory', stored=2)
+    cache.batch_get_cached(['h0', 'h1', 'missing'])
+    requests_before = len(dynamodb.get_requests)
+
+    found = cache.batch_get_cached(['h0', 'h1', 'missing'])
+    check(len(dynamodb.get_requests) == requests_before, "Repeat lookup answered from memory")
+    check(sorted(found) == ['h0', 'h1'], "Negative entry not returned as a hit")
+    check(cache.get_cached('missing') is None and not dynamodb.get_item_calls, "get_cached uses the negative entry")
+
+    # Negative entries expire quickly so new writes by other containers are seen
+    original_ttl = cache_module.NEGATIVE_TTL_SECONDS
+    cache_module.NEGATIVE_TTL_SECONDS = -1
+    try:
+        CacheManager._mem.clear()
+        cache.batch_get_cached(['missing'])
+        requests_before = len(dynamodb.get_requests)
+        cache.batch_get_cached(['missing'])
+        check(len(dynamodb.get_requests) == requests_before + 1, "Expired negative entry looked up again")
+    finally:
+        cache_module.NEGATIVE_TTL_SECONDS = original_ttl
+
+    # Oldest entries are evicted once the tier is full
+    original_max = cache_module.MEMORY_CACHE_MAX
+    cache_module.MEMORY_CACHE_MAX = 3
+    try:
+        cache, dynamodb = make_cache('memory-lru', stored=4)
+        cache.batch_get_cached(['h0', 'h1', 'h2', 'h3'])
+        check(len(CacheManager._mem) == 3, "Tier capped at MEMORY_CACHE_MAX")
+        check(not cache._mem_get('h0')[0] and cache._mem_get('h3')[0], "Least recently used entry evicted")
+    finally:
+        cache_module.MEMORY_CACHE_MAX = original_max
+    print()
+
+
+def test_batch_save_groups():
+    """Test that writes are split into BatchWriteItem groups of 25."""
+    print("TEST 5: BatchWriteItem Groups of 25")
+    print("-" * 80)
+
+    cache, dynamodb = make_cache('batch-save')
+    items = [cache.build_cache_item(f"w{i}", 'a.py', 'docs', {'cost': 0.1}) for i in range(60)]
+    items.append(items[0])  # duplicate key must not reach the same request
+
+    saved = cache.batch_save(items)
+    sizes = [len(request) for request in dynamodb.write_requests]
+
+    check(saved, "batch_save reports success")
+    check(sizes == [BATCH_WRITE_LIMIT, BATCH_WRITE_LIMIT, 10], f"Written as 25 + 25 + 10 {sizes}")
+    check(len(dynamodb.store) == 60, "Every unique item stored")
+    check(cache._mem_get('w59')[0], "Saved items added to the memory tier")
+    print()
+
+
+def test_unprocessed_items():
+    """Test UnprocessedItems retry and give-up after BATCH_MAX_RETRIES."""
+    print("TEST 6: UnprocessedItems Retry")
+    print("-" * 80)
+
+    cache, dynamodb = make_cache('unprocessed-items', unprocessed_rounds=2)
+    items = [cache.build_cache_item(f"u{i}", 'a.py', 'docs', {}) for i in range(5)]
+
+    check(cache.batch_save(items), "All items written after retries")
+    check(len(dynamodb.write_requests) == 3, "Unprocessed items retried twice")
+    check(dynamodb.write_requests[1] == ['u4'], "Only the unprocessed item was re-sent")
+
+    cache, dynamodb = make_cache('unprocessed-items-give-up', unprocessed_rounds=100)
+    items = [cache.build_cache_item(f"u{i}", 'a.py', 'docs', {}) for i in range(3)]
+
+    check(not cache.batch_save(items), "batch_save reports the failure")
+    check(len(dynamodb.write_requests) == cache_module.BATCH_MAX_RETRIES + 1, "Gave up after max retries")
+    check(not cache._mem_get('u2')[0], "Unwritten item not added to the memory tier")
+    check(cache._mem_get('u0')[0], "Written items still added to the memory tier")
+    print()
+
+
+def test_check_exists():
+    """Test that check_exists fetches only the key."""
+    print("TEST 7: Key-Only check_exists")
+    print("-" * 80)
+
+    cache, dynamodb = make_cache('check-exists', stored=1)
+
+    check(cache.check_exists('h0'), "Existing item found")
+    check(dynamodb.get_item_calls[-1]['ProjectionExpression'] == '#fh', "Only the key is projected")
+    check(not cache._mem_get('h0')[0], "Key-only item not cached in memory")
+
+    check(not cache.check_exists('missing'), "Missing item reported")
+    calls_before = len(dynamodb.get_item_calls)
+    check(not cache.check_exists('missing'), "Missing item still reported")
+    check(len(dynamodb.get_item_calls) == calls_before, "Miss answered from memory")
+
+    # A full item already in memory answers without a request
+    cache.batch_get_cached(['h0'])
+    calls_before = len(dynamodb.get_item_calls)
+    check(cache.check_exists('h0') and len(dynamodb.get_item_calls) == calls_before, "Hit answered from memory")
+    print()
+
+
+def main():
+    """Run all tests."""
+    print("=" * 80)
+    print("LOCAL CACHE BATCHING TEST (No AWS Calls)")
+    print("=" * 80)
+    print()
+
+    test_batch_get_groups()
+    test_batch_get_split()
+    test_unprocessed_keys()
+    test_memory_tier()
+    test_batch_save_groups()
+    test_unprocessed_items()
+    test_check_exists()
+
+    print("=" * 80)
+    if failures:
+        print(f"❌ {failures} CHECK(S) FAILED")
+        print("=" * 80)
+        sys.exit(1)
+
+    print("✅ ALL TESTS COMPLETE")
+    print("=" * 80)
+    print()
+
+
+if __name__ == "__main__":
+    main()